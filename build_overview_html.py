@@ -5,6 +5,7 @@ import json
 from pathlib import Path
 
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+IMAGE_EXT_TUPLE = tuple(IMAGE_EXTENSIONS)  # für str.endswith, spart Path-Objekte
 
 HTML_HEAD = '''<!DOCTYPE html>
 <html lang="de">
@@ -165,13 +166,29 @@ showOverview();
 
 def build_media_index(base_dir):
     index = {"folders": {}}
-    for root, dirs, files in os.walk(base_dir):
-        folder = Path(root)
-        if folder == base_dir:  # Hauptordner auslassen
+    # os.scandir statt os.walk: nutzt den gecachten Dateityp aus dem
+    # Verzeichniseintrag und spart ein stat() pro Eintrag. Pfade bleiben
+    # Strings; der relative Ordnername wird per Slice statt pathlib gebildet.
+    base_str = str(base_dir)
+    prefix_len = len(base_str.rstrip(os.sep)) + len(os.sep)
+    stack = [base_str]
+    while stack:
+        folder = stack.pop()
+        images = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(IMAGE_EXT_TUPLE):
+                        images.append(entry.name)
+        except OSError:
+            continue
+        if folder == base_str:  # Hauptordner auslassen
             continue
-        images = [f for f in sorted(files) if Path(f).suffix.lower() in IMAGE_EXTENSIONS]
         if images:
-            index["folders"][folder.relative_to(base_dir).as_posix()] = images
+            rel = folder[prefix_len:].replace(os.sep, '/')
+            index["folders"][rel] = sorted(images)
     return index
 
 if __name__ == "__main__":
@@ -185,7 +202,9 @@ if __name__ == "__main__":
     with open(out_file, "w", encoding="utf-8") as f:
         f.write(HTML_HEAD)
         f.write("let data = ")
-        json.dump(idx, f, ensure_ascii=False, indent=2)
+        # Kompaktes JSON: kein indent, keine Leerzeichen – halbiert die
+        # Dateigröße und beschleunigt JSON.parse im Browser.
+        json.dump(idx, f, ensure_ascii=False, separators=(',', ':'))
         f.write(";")
         f.write(JS_CORE)
 
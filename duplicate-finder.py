@@ -18,10 +18,20 @@ import os
 import sys
 import hashlib
 import logging
+import mmap
+import multiprocessing
+import queue
+import sqlite3
+import struct
+import threading
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from collections import defaultdict
+from operator import attrgetter
 import argparse
 
 # Try to import required libraries
@@ -39,50 +49,137 @@ except ImportError:
 
 try:
     import imagehash
+    import numpy as np  # hard dependency of imagehash
     IMAGEHASH_AVAILABLE = True
 except ImportError:
     IMAGEHASH_AVAILABLE = False
     print("Note: imagehash not found. --similar mode disabled. Install with: pip install imagehash")
 
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+    print("Note: blake3 not found. Falling back to MD5 hashing. Install with: pip install blake3")
+
+try:
+    import send2trash
+    SEND2TRASH_AVAILABLE = True
+except ImportError:
+    SEND2TRASH_AVAILABLE = False
+
 # Constants
 SUPPORTED_FORMATS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
+SUPPORTED_EXT_TUPLE = tuple(SUPPORTED_FORMATS)  # for str.endswith in the scan loop
 DEFAULT_SIMILARITY_THRESHOLD = 95
+HASH_METHODS = {
+    'ahash': imagehash.average_hash,
+    'dhash': imagehash.dhash,
+    'phash': imagehash.phash,
+    'whash': imagehash.whash,
+} if IMAGEHASH_AVAILABLE else {}
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MiB reads keep the Python-level loop off the hot path
+MMAP_THRESHOLD = 64 * 1024  # Files above this are hashed via mmap in one C call
+HEAD_HASH_SIZE = 64 * 1024  # Bytes covered by the cheap first-stage hash
+CACHE_DB_PATH = Path.home() / '.cache' / 'duplicate-finder' / 'hashes.db'
+CONTENT_HASH_ALGO = 'blake3' if BLAKE3_AVAILABLE else 'md5'  # tags cache rows
 
-# Setup logging
+# Setup logging. File writes go through a queue so a slow disk never sits
+# on the deletion/hashing critical path; the console handler stays direct.
+# Only the sinks get the timestamp formatter: QueueHandler.prepare() bakes
+# its formatter's output into the record, so giving it the same format as
+# the file handler would prefix every file line twice.
+_log_queue = queue.Queue(-1)
+_file_handler = RotatingFileHandler('duplicate_finder.log', maxBytes=10_000_000, backupCount=3)
+_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('duplicate_finder.log'),
-        logging.StreamHandler()
+        _queue_handler,
+        _console_handler
     ]
 )
+_log_listener = QueueListener(_log_queue, _file_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
 class ImageFile:
-    """Represents an image file with its metadata."""
-    
-    def __init__(self, path: str):
+    """Represents an image file with its metadata.
+
+    Instances are created once per scanned file, so the layout is kept
+    lean: slots instead of a dict, and the Path view is built on demand
+    rather than stored.
+    """
+
+    __slots__ = ('path', 'size', 'mtime', '_hash', '_head_hash',
+                 '_perceptual_hash', '_dimensions')
+
+    # Perceptual hash algorithm, overridden from --hash-method at startup.
+    # dhash is faster than average_hash and discriminates better.
+    hash_method = 'ahash'
+
+    def __init__(self, path: str, size: Optional[int] = None, mtime: Optional[float] = None):
         self.path = path
-        self.file_path = Path(path)
-        self.size = os.path.getsize(path)
-        self.mtime = os.path.getmtime(path)
+        self.size = os.path.getsize(path) if size is None else size
+        self.mtime = os.path.getmtime(path) if mtime is None else mtime
         self._hash = None
+        self._head_hash = None
         self._perceptual_hash = None
         self._dimensions = None
-        
+
+    @property
+    def file_path(self) -> Path:
+        """Path view of the file, constructed lazily (display paths only)."""
+        return Path(self.path)
+
+    @classmethod
+    def from_dirent(cls, entry: os.DirEntry) -> 'ImageFile':
+        """Build an ImageFile from a scandir entry, reusing its cached stat."""
+        st = entry.stat(follow_symlinks=False)
+        return cls(entry.path, size=st.st_size, mtime=st.st_mtime)
+
     @property
     def hash(self) -> str:
-        """Calculate MD5 hash of file content."""
+        """Calculate content hash (BLAKE3 if available, else MD5)."""
         if self._hash is None:
-            hasher = hashlib.md5()
+            if BLAKE3_AVAILABLE:
+                hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+            else:
+                hasher = hashlib.md5()
             with open(self.path, 'rb') as f:
-                for chunk in iter(lambda: f.read(8192), b''):
-                    hasher.update(chunk)
+                if self.size > MMAP_THRESHOLD:
+                    # Memory-map larger files so hashlib consumes the whole
+                    # file in one C call with no per-chunk Python overhead.
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if hasattr(mm, 'madvise'):
+                            mm.madvise(mmap.MADV_SEQUENTIAL)
+                        hasher.update(mm)
+                else:
+                    buffer = bytearray(HASH_CHUNK_SIZE)
+                    view = memoryview(buffer)
+                    while True:
+                        bytes_read = f.readinto(buffer)
+                        if not bytes_read:
+                            break
+                        hasher.update(view[:bytes_read])
             self._hash = hasher.hexdigest()
         return self._hash
     
+    @property
+    def head_hash(self) -> str:
+        """Cheap first-stage hash over the first 64 KiB only."""
+        if self._head_hash is None:
+            with open(self.path, 'rb') as f:
+                head = f.read(HEAD_HASH_SIZE)
+            self._head_hash = hashlib.blake2b(head, digest_size=16).hexdigest()
+        return self._head_hash
+
     @property
     def perceptual_hash(self) -> Optional[str]:
         """Calculate perceptual hash for similarity detection."""
@@ -92,19 +189,78 @@ class ImageFile:
         if self._perceptual_hash is None:
             try:
                 with Image.open(self.path) as img:
-                    self._perceptual_hash = str(imagehash.average_hash(img))
+                    # Hash algorithms only look at luma, so convert to
+                    # grayscale first and resize a single channel, not three.
+                    hash_func = HASH_METHODS[self.hash_method]
+                    self._perceptual_hash = str(hash_func(img.convert('L')))
             except Exception as e:
                 logger.warning(f"Could not calculate perceptual hash for {self.file_path.name}: {e}")
                 self._perceptual_hash = ""
         return self._perceptual_hash
     
+    @staticmethod
+    def _read_jpeg_dimensions(f) -> Optional[Tuple[int, int]]:
+        """Walk JPEG segments to the SOF marker and read its dimensions."""
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            code = marker[1]
+            while code == 0xFF:  # skip fill bytes
+                next_byte = f.read(1)
+                if not next_byte:
+                    return None
+                code = next_byte[0]
+            if code == 0x01 or 0xD0 <= code <= 0xD8:  # standalone markers
+                continue
+            length_bytes = f.read(2)
+            if len(length_bytes) < 2:
+                return None
+            (length,) = struct.unpack('>H', length_bytes)
+            if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                data = f.read(5)  # precision byte, then height and width
+                if len(data) < 5:
+                    return None
+                height, width = struct.unpack('>HH', data[1:5])
+                return width, height
+            f.seek(length - 2, 1)
+
+    def _read_header_dimensions(self) -> Optional[Tuple[int, int]]:
+        """Read width/height from the file header without decoding pixels."""
+        with open(self.path, 'rb') as f:
+            head = f.read(32)
+            if head.startswith(b'\x89PNG\r\n\x1a\n'):
+                return struct.unpack('>II', head[16:24])
+            if head.startswith((b'GIF87a', b'GIF89a')):
+                return struct.unpack('<HH', head[6:10])
+            if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+                chunk = head[12:16]
+                if chunk == b'VP8X':
+                    return (int.from_bytes(head[24:27], 'little') + 1,
+                            int.from_bytes(head[27:30], 'little') + 1)
+                if chunk == b'VP8L':
+                    bits = int.from_bytes(head[21:25], 'little')
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b'VP8 ':
+                    width, height = struct.unpack('<HH', head[26:30])
+                    return width & 0x3FFF, height & 0x3FFF
+                return None
+            if head.startswith(b'\xff\xd8'):
+                return self._read_jpeg_dimensions(f)
+        return None
+
     @property
     def dimensions(self) -> Tuple[int, int]:
         """Get image dimensions (width, height)."""
         if self._dimensions is None:
             try:
-                with Image.open(self.path) as img:
-                    self._dimensions = img.size
+                # Header-only parse avoids PIL's metadata machinery; fall
+                # back to a full open for formats the parser doesn't know.
+                self._dimensions = self._read_header_dimensions()
+                if self._dimensions is None:
+                    with Image.open(self.path) as img:
+                        self._dimensions = img.size
             except Exception as e:
                 logger.warning(f"Could not get dimensions for {self.file_path.name}: {e}")
                 self._dimensions = (0, 0)
@@ -125,12 +281,112 @@ class ImageFile:
         return f"ImageFile({self.file_path.name}, {self.size} bytes)"
 
 
+def _init_phash_worker(hash_method: str):
+    """Propagate the selected --hash-method into pool worker processes."""
+    ImageFile.hash_method = hash_method
+
+
+def _compute_phash(path: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Compute a perceptual hash in a pool worker.
+
+    Module-level so it pickles; returns (path, phash, error_message).
+    """
+    try:
+        with Image.open(path) as img:
+            hash_func = HASH_METHODS[ImageFile.hash_method]
+            return path, str(hash_func(img.convert('L'))), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+class HashCache:
+    """Persistent hash cache keyed on (path, size, mtime), backed by SQLite.
+
+    Hashes from earlier runs are reused as long as the file's size and
+    mtime are unchanged, so repeat scans only hash new or modified files.
+    """
+
+    def __init__(self, db_path: Path = CACHE_DB_PATH):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS hashes ('
+            'path TEXT PRIMARY KEY, size INTEGER, mtime REAL, '
+            'content_hash TEXT, content_algo TEXT, hash_method TEXT, '
+            'perceptual_hash TEXT)'
+        )
+        try:
+            # Migrate databases written before the algorithm was recorded;
+            # their rows keep a NULL algo and read as misses below.
+            self.conn.execute('ALTER TABLE hashes ADD COLUMN content_algo TEXT')
+        except sqlite3.OperationalError:
+            pass
+
+    def clear(self):
+        """Drop all cached hashes."""
+        with self.conn:
+            self.conn.execute('DELETE FROM hashes')
+        logger.info("Hash cache cleared")
+
+    def prime(self, images):
+        """Yield images from the stream, populating cached hashes on the way."""
+        for img in images:
+            # Key on the absolute path: a relative path depends on the cwd
+            # and could collide with a different file from another run.
+            row = self.conn.execute(
+                'SELECT size, mtime, content_hash, content_algo, hash_method, '
+                'perceptual_hash FROM hashes WHERE path = ?',
+                (os.path.abspath(img.path),)).fetchone()
+            if row and row[0] == img.size and row[1] == img.mtime:
+                # Only reuse hashes computed with the algorithms of this run;
+                # mixing MD5 and BLAKE3 digests would split duplicate groups.
+                if row[3] == CONTENT_HASH_ALGO:
+                    img._hash = row[2]
+                if row[4] == ImageFile.hash_method:
+                    img._perceptual_hash = row[5]
+            yield img
+
+    def store(self, images: List[ImageFile]):
+        """Write back every computed hash in one transaction."""
+        rows = [
+            (os.path.abspath(img.path), img.size, img.mtime, img._hash, CONTENT_HASH_ALGO,
+             ImageFile.hash_method, img._perceptual_hash)
+            for img in images
+            if img._hash is not None or img._perceptual_hash is not None
+        ]
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO hashes '
+                '(path, size, mtime, content_hash, content_algo, hash_method, perceptual_hash) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def popcount64(values: 'np.ndarray') -> 'np.ndarray':
+    """Per-element popcount of a uint64 array."""
+    return np.unpackbits(values.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+
+
 class DuplicateFinder:
     """Main class for finding and managing duplicate images."""
     
     def __init__(self, root_dir: str, args):
         self.root_dir = Path(root_dir)
         self.args = args
+        ImageFile.hash_method = args.hash_method
+        # Resolve the keep strategy to a key function once; minimizing
+        # strategies are expressed as negated maximums so selection is
+        # always a single max() call.
+        img_key = {
+            'highest-res': attrgetter('pixels'),
+            'oldest': lambda img: -img.mtime,
+            'newest': attrgetter('mtime'),
+            'shortest-path': lambda img: -img.path_depth,
+        }.get(args.keep, attrgetter('size'))  # 'largest' and default
+        self._keep_key = lambda entry: img_key(entry[1])
         self.all_images: List[ImageFile] = []
         self.duplicates: Dict[str, List[ImageFile]] = defaultdict(list)
         self.similar_groups: List[List[ImageFile]] = []
@@ -143,58 +399,115 @@ class DuplicateFinder:
             'deleted_size': 0,
             'errors': 0
         }
-        
-    def scan_directory(self) -> List[ImageFile]:
-        """Scan directory for image files."""
+        self._stats_lock = threading.Lock()
+
+    def iter_image_entries(self, root: str, exclude_dirs: set):
+        """Walk root with os.scandir, yielding DirEntry objects for supported images.
+
+        DirEntry caches the file type from the directory read itself, so this
+        avoids the extra stat() per entry that os.walk performs.
+        """
+        stack = [root]
+
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in exclude_dirs:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(SUPPORTED_EXT_TUPLE):
+                            yield entry
+            except OSError as e:
+                logger.error(f"Error scanning {current}: {e}")
+                self.stats['errors'] += 1
+
+    def scan_directory(self):
+        """Lazily yield image files so consumers can start working mid-scan."""
         logger.info(f"Scanning directory: {self.root_dir}")
-        
-        image_files = []
+
         exclude_dirs = set(self.args.exclude_dirs.split(',')) if self.args.exclude_dirs else set()
-        
-        for root, dirs, files in os.walk(self.root_dir):
-            # Remove excluded directories
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
-            
-            for file in files:
-                file_path = Path(root) / file
-                
-                # Check extension
-                if file_path.suffix.lower() not in SUPPORTED_FORMATS:
+
+        for entry in self.iter_image_entries(str(self.root_dir), exclude_dirs):
+            # Check minimum size
+            try:
+                img = ImageFile.from_dirent(entry)
+                if img.size < self.args.min_size * 1024:  # Convert KB to bytes
                     continue
-                
-                # Check minimum size
-                try:
-                    size = os.path.getsize(file_path)
-                    if size < self.args.min_size * 1024:  # Convert KB to bytes
-                        continue
-                    
-                    image_files.append(ImageFile(str(file_path)))
-                    self.stats['total_files'] += 1
-                    self.stats['total_size'] += size
-                    
-                except Exception as e:
-                    logger.error(f"Error accessing {file_path}: {e}")
-                    self.stats['errors'] += 1
-        
-        logger.info(f"Found {len(image_files)} image files")
-        return image_files
+
+                self.stats['total_files'] += 1
+                self.stats['total_size'] += img.size
+                yield img
+
+            except Exception as e:
+                logger.error(f"Error accessing {entry.path}: {e}")
+                self.stats['errors'] += 1
     
-    def find_exact_duplicates(self, images: List[ImageFile]):
-        """Find exact duplicates using MD5 hash."""
+    def find_exact_duplicates(self, images) -> List[ImageFile]:
+        """Find exact duplicates using content hashes.
+
+        Consumes the (possibly lazy) image stream and returns the full list
+        of scanned images for later passes.
+        """
         logger.info("Finding exact duplicates...")
-        
-        hash_map = defaultdict(list)
-        
-        iterator = tqdm(images, desc="Computing hashes", unit="file") if tqdm else images
-        
-        for img in iterator:
+
+        # Two files can only be identical if their sizes match, so bucket by
+        # size first and only hash files whose size collides. Unique-sized
+        # files skip the hash read entirely.
+        by_size = defaultdict(list)
+        scanned = 0
+        for img in images:
+            by_size[img.size].append(img)
+            scanned += 1
+        logger.info(f"Found {scanned} image files")
+
+        size_candidates = [img for bucket in by_size.values() if len(bucket) > 1 for img in bucket]
+        logger.info(f"{len(size_candidates)} of {scanned} files share a size")
+
+        def compute_head_hash(img: ImageFile) -> Tuple[ImageFile, Optional[str]]:
             try:
-                file_hash = img.hash
-                hash_map[file_hash].append(img)
+                return img, img.head_hash
             except Exception as e:
                 logger.error(f"Error hashing {img.path}: {e}")
-                self.stats['errors'] += 1
-        
+                with self._stats_lock:
+                    self.stats['errors'] += 1
+                return img, None
+
+        def compute_hash(img: ImageFile) -> Tuple[ImageFile, Optional[str]]:
+            try:
+                return img, img.hash
+            except Exception as e:
+                logger.error(f"Error hashing {img.path}: {e}")
+                with self._stats_lock:
+                    self.stats['errors'] += 1
+                return img, None
+
+        # Second stage: within each size bucket, a cheap hash over the first
+        # 64 KiB weeds out same-size files that differ early (common for
+        # camera JPEGs), so only real collision candidates get a full read.
+        by_head = defaultdict(list)
+        hash_map = defaultdict(list)
+
+        # Hashing is I/O-bound and hashlib releases the GIL, so threads scale.
+        with ThreadPoolExecutor(max_workers=self.args.jobs) as executor:
+            results = executor.map(compute_head_hash, size_candidates)
+            if tqdm:
+                results = tqdm(results, total=len(size_candidates), desc="Computing head hashes", unit="file")
+            for img, head_hash in results:
+                if head_hash is not None:
+                    by_head[(img.size, head_hash)].append(img)
+
+            candidates = [img for bucket in by_head.values() if len(bucket) > 1 for img in bucket]
+            logger.info(f"{len(candidates)} files also share a head hash and need full hashing")
+
+            results = executor.map(compute_hash, candidates)
+            if tqdm:
+                results = tqdm(results, total=len(candidates), desc="Computing hashes", unit="file")
+            for img, file_hash in results:
+                if file_hash is not None:
+                    hash_map[file_hash].append(img)
+
         # Filter to only groups with duplicates
         self.duplicates = {h: imgs for h, imgs in hash_map.items() if len(imgs) > 1}
         
@@ -207,6 +520,8 @@ class DuplicateFinder:
         logger.info(f"Found {len(self.duplicates)} groups of exact duplicates")
         logger.info(f"Total duplicate files: {self.stats['duplicate_files']}")
         logger.info(f"Total duplicate size: {self.stats['duplicate_size'] / (1024**2):.2f} MB")
+
+        return [img for bucket in by_size.values() for img in bucket]
     
     def find_similar_images(self, images: List[ImageFile]):
         """Find similar images using perceptual hashing."""
@@ -216,64 +531,67 @@ class DuplicateFinder:
         
         logger.info("Finding similar images...")
         
-        # Calculate perceptual hashes
+        # Calculate perceptual hashes. Decode + resize + hash kernel is
+        # CPU-bound, so this runs on a process pool instead of threads.
+        todo = [img for img in images if img._perceptual_hash is None]
+        by_path = {img.path: img for img in todo}
+
+        if todo:
+            with multiprocessing.Pool(self.args.jobs, initializer=_init_phash_worker,
+                                      initargs=(ImageFile.hash_method,)) as pool:
+                results = pool.imap_unordered(_compute_phash, (img.path for img in todo), chunksize=64)
+                if tqdm:
+                    results = tqdm(results, total=len(todo), desc="Computing perceptual hashes", unit="file")
+                for path, phash, error in results:
+                    if error is not None:
+                        logger.error(f"Error calculating perceptual hash for {path}: {error}")
+                        self.stats['errors'] += 1
+                        by_path[path]._perceptual_hash = ""
+                    else:
+                        by_path[path]._perceptual_hash = phash
+
+        # Keep hashes as plain ints; no need to rebuild ImageHash objects
+        # just to take distances the vectorized kernel computes anyway.
         hash_map = {}
-        iterator = tqdm(images, desc="Computing perceptual hashes", unit="file") if tqdm else images
-        
-        for img in iterator:
-            try:
-                phash = img.perceptual_hash
-                if phash:
-                    hash_map[img] = imagehash.hex_to_hash(phash)
-            except Exception as e:
-                logger.error(f"Error calculating perceptual hash for {img.path}: {e}")
-                self.stats['errors'] += 1
-        
-        # Find similar groups
-        processed = set()
-        threshold = (100 - self.args.similarity) / 100 * 64  # Convert percentage to hash distance
-        
+        for img in images:
+            phash = img.perceptual_hash
+            if phash:
+                hash_map[img] = int(phash, 16)
+
+        # Find similar groups: pack all hashes into one uint64 array and
+        # compute each query's full distance row with a vectorized
+        # xor + popcount instead of a Python-level inner loop.
+        threshold = int((100 - self.args.similarity) / 100 * 64)  # Convert percentage to hash distance
+
+        candidates = list(hash_map)
+        hashes = np.fromiter(
+            (hash_map[img] for img in candidates),
+            dtype=np.uint64, count=len(candidates)
+        )
+
         logger.info("Comparing images for similarity...")
-        for img1 in hash_map:
-            if img1 in processed:
+        processed = np.zeros(len(candidates), dtype=bool)
+        for i in range(len(candidates)):
+            if processed[i]:
                 continue
-            
-            group = [img1]
-            processed.add(img1)
-            
-            for img2 in hash_map:
-                if img2 in processed:
-                    continue
-                
-                # Calculate hash distance
-                distance = hash_map[img1] - hash_map[img2]
-                
-                if distance <= threshold:
-                    group.append(img2)
-                    processed.add(img2)
-            
-            if len(group) > 1:
-                self.similar_groups.append(group)
-        
+
+            processed[i] = True
+            distances = popcount64(hashes ^ hashes[i])
+            members = np.nonzero((distances <= threshold) & ~processed)[0]
+
+            if members.size:
+                processed[members] = True
+                self.similar_groups.append([candidates[i]] + [candidates[j] for j in members])
+
         logger.info(f"Found {len(self.similar_groups)} groups of similar images")
     
-    def select_file_to_keep(self, group: List[ImageFile]) -> ImageFile:
-        """Select which file to keep based on strategy."""
-        strategy = self.args.keep
-        
-        if strategy == 'largest':
-            return max(group, key=lambda x: x.size)
-        elif strategy == 'highest-res':
-            return max(group, key=lambda x: x.pixels)
-        elif strategy == 'oldest':
-            return min(group, key=lambda x: x.mtime)
-        elif strategy == 'newest':
-            return max(group, key=lambda x: x.mtime)
-        elif strategy == 'shortest-path':
-            return min(group, key=lambda x: x.path_depth)
-        else:
-            # Default: largest file
-            return max(group, key=lambda x: x.size)
+    def select_file_to_keep(self, group: List[ImageFile]) -> Tuple[int, ImageFile]:
+        """Select which file to keep using the precomputed strategy key.
+
+        Returns (index, file) so callers don't need an O(n) group.index
+        scan afterwards.
+        """
+        return max(enumerate(group), key=self._keep_key)
     
     def display_duplicate_group(self, group: List[ImageFile], group_num: int, is_similar: bool = False):
         """Display information about a duplicate group."""
@@ -308,8 +626,8 @@ class DuplicateFinder:
         for file_hash, group in self.duplicates.items():
             self.display_duplicate_group(group, group_num, is_similar=False)
             
-            suggested = self.select_file_to_keep(group)
-            suggested_idx = group.index(suggested) + 1
+            keep_idx, suggested = self.select_file_to_keep(group)
+            suggested_idx = keep_idx + 1
             
             print(f"\n💡 Suggested to keep: [{suggested_idx}] (Strategy: {self.args.keep})")
             
@@ -324,8 +642,8 @@ class DuplicateFinder:
                     break
                 elif choice.isdigit() and 1 <= int(choice) <= len(group):
                     keep_idx = int(choice) - 1
-                    to_delete = [img for i, img in enumerate(group) if i != keep_idx]
-                    
+                    to_delete = group[:keep_idx] + group[keep_idx + 1:]
+
                     self.delete_files(to_delete)
                     break
                 else:
@@ -337,8 +655,8 @@ class DuplicateFinder:
         for group in self.similar_groups:
             self.display_duplicate_group(group, group_num, is_similar=True)
             
-            suggested = self.select_file_to_keep(group)
-            suggested_idx = group.index(suggested) + 1
+            keep_idx, suggested = self.select_file_to_keep(group)
+            suggested_idx = keep_idx + 1
             
             print(f"\n💡 Suggested to keep: [{suggested_idx}] (Strategy: {self.args.keep})")
             
@@ -353,8 +671,8 @@ class DuplicateFinder:
                     break
                 elif choice.isdigit() and 1 <= int(choice) <= len(group):
                     keep_idx = int(choice) - 1
-                    to_delete = [img for i, img in enumerate(group) if i != keep_idx]
-                    
+                    to_delete = group[:keep_idx] + group[keep_idx + 1:]
+
                     self.delete_files(to_delete)
                     break
                 else:
@@ -376,16 +694,16 @@ class DuplicateFinder:
         
         # Process exact duplicates
         for file_hash, group in self.duplicates.items():
-            keep = self.select_file_to_keep(group)
-            to_delete = [img for img in group if img != keep]
+            keep_idx, keep = self.select_file_to_keep(group)
+            to_delete = group[:keep_idx] + group[keep_idx + 1:]
             all_to_delete.extend(to_delete)
             
             logger.info(f"Group: Keeping {keep.file_path.name}, deleting {len(to_delete)} files")
         
         # Process similar images
         for group in self.similar_groups:
-            keep = self.select_file_to_keep(group)
-            to_delete = [img for img in group if img != keep]
+            keep_idx, keep = self.select_file_to_keep(group)
+            to_delete = group[:keep_idx] + group[keep_idx + 1:]
             all_to_delete.extend(to_delete)
             
             logger.info(f"Similar group: Keeping {keep.file_path.name}, deleting {len(to_delete)} files")
@@ -403,20 +721,53 @@ class DuplicateFinder:
             self.delete_files(all_to_delete)
     
     def delete_files(self, files: List[ImageFile]):
-        """Delete specified files."""
-        for img in files:
-            try:
-                if not self.args.dry_run:
-                    os.remove(img.path)
-                    logger.info(f"Deleted: {img.path}")
-                else:
-                    logger.info(f"[DRY RUN] Would delete: {img.path}")
-                
-                self.stats['deleted_files'] += 1
-                self.stats['deleted_size'] += img.size
-            except Exception as e:
-                logger.error(f"Error deleting {img.path}: {e}")
-                self.stats['errors'] += 1
+        """Delete specified files (thread pool; removal is I/O-bound)."""
+        if self.args.dry_run:
+            action = "[DRY RUN] Would delete"
+        elif self.args.trash:
+            action = "Moved to trash"
+        else:
+            action = "Deleted"
+
+        def remove(img: ImageFile) -> ImageFile:
+            if self.args.trash:
+                send2trash.send2trash(img.path)
+            else:
+                os.unlink(img.path)
+            return img
+
+        deleted = 0
+        freed = 0
+        failures = []
+
+        if self.args.dry_run:
+            for img in files:
+                # Per-file lines are DEBUG (see --verbose); one INFO summary
+                # per batch keeps logging off the deletion hot path.
+                logger.debug(f"{action}: {img.path}")
+                deleted += 1
+                freed += img.size
+        else:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                futures = {executor.submit(remove, img): img for img in files}
+                for future in as_completed(futures):
+                    img = futures[future]
+                    try:
+                        future.result()
+                        logger.debug(f"{action}: {img.path}")
+                        deleted += 1
+                        freed += img.size
+                    except Exception as e:
+                        failures.append((img.path, e))
+
+        self.stats['deleted_files'] += deleted
+        self.stats['deleted_size'] += freed
+
+        for path, e in failures:
+            logger.error(f"Error deleting {path}: {e}")
+        self.stats['errors'] += len(failures)
+
+        logger.info(f"{action}: {deleted} files ({freed / (1024**2):.2f} MB)")
     
     def print_summary(self):
         """Print final summary."""
@@ -442,20 +793,45 @@ class DuplicateFinder:
         logger.info(f"Keep strategy: {self.args.keep}")
         logger.info("="*60)
         
-        # Scan directory
-        self.all_images = self.scan_directory()
-        
+        # Open the persistent hash cache
+        cache = None
+        if not self.args.no_cache:
+            try:
+                cache = HashCache()
+                if self.args.clear_cache:
+                    cache.clear()
+            except Exception as e:
+                logger.warning(f"Hash cache unavailable: {e}")
+                cache = None
+
+        # Scan lazily; images stream straight into duplicate detection,
+        # picking up cached hashes on the way past.
+        images = self.scan_directory()
+        if cache is not None:
+            images = cache.prime(images)
+
+        # Find exact duplicates (consumes the scan stream)
+        self.all_images = self.find_exact_duplicates(images)
+
         if not self.all_images:
             logger.info("No image files found!")
+            if cache is not None:
+                cache.close()
             return
-        
-        # Find exact duplicates
-        self.find_exact_duplicates(self.all_images)
-        
+
         # Find similar images if requested
         if self.args.similar:
             self.find_similar_images(self.all_images)
-        
+
+        # Persist newly computed hashes for the next run
+        if cache is not None:
+            try:
+                cache.store(self.all_images)
+            except Exception as e:
+                logger.warning(f"Could not update hash cache: {e}")
+            finally:
+                cache.close()
+
         # Process duplicates
         if self.args.interactive:
             self.process_duplicates_interactive()
@@ -487,6 +863,9 @@ Examples:
                        help='Also find similar (not just exact) duplicates')
     parser.add_argument('--similarity', type=int, default=95,
                        help='Similarity threshold for similar images (0-100, default: 95)')
+    parser.add_argument('--hash-method', choices=['ahash', 'dhash', 'phash', 'whash'],
+                       default='dhash',
+                       help='Perceptual hash algorithm for --similar (default: dhash)')
     
     # Processing mode
     mode_group = parser.add_mutually_exclusive_group()
@@ -500,6 +879,14 @@ Examples:
                        default='largest',
                        help='Which file to keep in each duplicate group (default: largest)')
     
+    # Performance
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                       help='Number of worker threads for hashing (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Do not read or write the persistent hash cache')
+    parser.add_argument('--clear-cache', action='store_true',
+                       help='Clear the persistent hash cache before scanning')
+
     # Filters
     parser.add_argument('--min-size', type=int, default=0,
                        help='Minimum file size in KB (default: 0)')
@@ -509,14 +896,21 @@ Examples:
     # Safety options
     parser.add_argument('--dry-run', action='store_true',
                        help='Show what would be deleted without actually deleting')
+    parser.add_argument('--trash', action='store_true',
+                       help='Move files to the system trash instead of deleting')
     parser.add_argument('--yes', '-y', action='store_true',
                        help='Skip confirmation prompt in auto mode')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                       help='Log every individual file operation')
     
     args = parser.parse_args()
     
     # Validation
     if args.similar and not IMAGEHASH_AVAILABLE:
         parser.error("--similar requires imagehash library. Install with: pip install imagehash")
+
+    if args.trash and not SEND2TRASH_AVAILABLE:
+        parser.error("--trash requires send2trash library. Install with: pip install send2trash")
     
     if not os.path.isdir(args.directory):
         parser.error(f"Directory does not exist: {args.directory}")
@@ -527,7 +921,10 @@ Examples:
 def main():
     """Main entry point."""
     args = parse_arguments()
-    
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
     try:
         finder = DuplicateFinder(args.directory, args)
         finder.run()
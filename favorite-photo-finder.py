@@ -9,6 +9,13 @@ import shutil
 import argparse
 import logging
 import re
+import struct
+import functools
+import itertools
+import json
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from xml.etree import ElementTree
@@ -19,6 +26,7 @@ except ImportError:
     tqdm = None
 
 SUPPORTED_FORMATS = ['.jpg', '.jpeg']
+SUPPORTED_EXT_SET = frozenset(SUPPORTED_FORMATS)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -33,82 +41,314 @@ NAMESPACES = {
     "dc": "http://purl.org/dc/elements/1.1/"
 }
 
-def extract_xmp(file_path):
-    """Extract XMP XML block from JPEG binary."""
+# Vorberechnete Attribut-/Suchschlüssel: einmal pro Import statt pro Bild
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDF_DESCRIPTION_PATH = f".//{{{RDF_NS}}}Description"
+RDF_LI_PATH = f".//{{{RDF_NS}}}li"
+DC_SUBJECT_PATH = f".//{{{NAMESPACES['dc']}}}subject"
+XMP_RATING_ATTR = f"{{{NAMESPACES['xmp']}}}Rating"
+MSP_RATING_ATTR = f"{{{NAMESPACES['msp']}}}Rating"
+XMP_KEYWORDS_ATTR = f"{{{NAMESPACES['xmp']}}}Keywords"
+
+XMP_HEAD_BYTES = 256 * 1024  # XMP liegt fast immer im APP1-Segment am Dateianfang
+MIN_FILE_SIZE = 256  # SOI + minimales APP1; auch winzige JPEGs tragen volles XMP
+XMP_START = b"<x:xmpmeta"
+XMP_END = b"</x:xmpmeta>"
+
+
+def _locate_xmp(data):
+    """Schneidet den XMP-Block per bytes.find heraus (C-Schleife statt Regex)."""
+    start = data.find(XMP_START)
+    if start < 0:
+        return None
+    end = data.find(XMP_END, start)
+    if end < 0:
+        return None
+    return data[start:end + len(XMP_END)].decode("utf-8", errors="ignore")
+
+
+XMP_APP1_SIG = b"http://ns.adobe.com/xap/1.0/\x00"
+
+
+def _extract_xmp_scan(file_path):
+    """Fallback: XMP per Byte-Scan suchen (erst Dateikopf, dann Rest)."""
     with open(file_path, "rb") as f:
-        data = f.read()
-        m = re.search(b"<x:xmpmeta[\s\S]+?</x:xmpmeta>", data)
-        if not m:
+        head = f.read(XMP_HEAD_BYTES)
+        xmp = _locate_xmp(head)
+        if xmp is not None:
+            return xmp
+        if len(head) < XMP_HEAD_BYTES:
             return None
-        xml_str = m.group(0).decode("utf-8", errors="ignore")
-        return xml_str
+        # Marker nicht im Kopf gefunden: seltener Fall, Rest nachladen.
+        # Beginnt der Block schon im Kopf, nur ab dort weiterlesen; sonst
+        # reicht ein kleiner Überlapp statt einer Kopie des ganzen Kopfs.
+        start = head.find(XMP_START)
+        if start >= 0:
+            return _locate_xmp(head[start:] + f.read())
+        return _locate_xmp(head[-(len(XMP_START) - 1):] + f.read())
+
+
+def extract_xmp(file_path):
+    """Extract XMP XML block from JPEG binary.
+
+    Läuft die JPEG-Segmenttabelle ab und springt direkt zum XMP-APP1-
+    Segment (Adobe-Signatur); liest dadurch nur wenige KB statt der
+    ganzen Datei. Byte-Scan nur noch als Fallback für kaputte Marker.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                # Falsche Magic-Bytes: kein JPEG, Scan lohnt sich nicht
+                return None
+            while True:
+                header = f.read(4)
+                if len(header) < 4 or header[0] != 0xFF:
+                    break
+                code = header[1]
+                if code == 0xDA:  # SOS: Bilddaten, kein XMP mehr zu erwarten
+                    return None
+                (length,) = struct.unpack(">H", header[2:4])
+                if code == 0xE1:
+                    payload = f.read(length - 2)
+                    if payload.startswith(XMP_APP1_SIG):
+                        return _locate_xmp(payload)
+                else:
+                    f.seek(length - 2, 1)
+    except OSError:
+        return None
+    return _extract_xmp_scan(file_path)
+
+# Gezielte Regexe statt XML-Parse: wir brauchen nur zwei Attribute und den
+# dc:subject-Bag, ein kompletter ElementTree-Baum pro Bild ist Verschwendung
+RE_XMP_RATING = re.compile(r'xmp:Rating="(-?\d+)"')
+RE_MSP_RATING = re.compile(r'MicrosoftPhoto:Rating="(\d+)"')
+RE_XMP_KEYWORDS = re.compile(r'xmp:Keywords="([^"]*)"')
+RE_DC_SUBJECT = re.compile(r'<dc:subject>(.*?)</dc:subject>', re.S)
+RE_RDF_LI = re.compile(r'<rdf:li[^>]*>([^<]+)</rdf:li>')
+
+
+def _msp_to_stars(val):
+    """Windows-Prozentbewertung (0-99) auf 1-5 Sterne abbilden."""
+    if val <= 1: return 1
+    elif val <= 25: return 2
+    elif val <= 50: return 3
+    elif val <= 75: return 4
+    else: return 5
+
+
+KEYWORD_SEPARATORS = (';', ',', '|')
+
+
+def _add_keyword_attr(kw, keywords):
+    """xmp:Keywords-Attributwert aufsplitten (';', ',' oder '|')."""
+    for sep in KEYWORD_SEPARATORS:
+        if sep in kw:
+            keywords.update(k.strip().upper() for k in kw.split(sep))
+            break
+    else:
+        keywords.add(kw.strip().upper())
+
+
+def _parse_xmp_tree(xmp_str):
+    """Parst den XMP-Block einmal per ElementTree (None bei kaputtem XML)."""
+    try:
+        return ElementTree.fromstring(xmp_str)
+    except Exception as e:
+        logger.debug("XMP parse error: %s", e)
+        return None
+
+
+def _rating_from_regex(xmp_str):
+    """Bewertung über die schnellen Regex-Pfade; None, wenn nichts passt."""
+    m = RE_XMP_RATING.search(xmp_str)
+    if m:
+        return int(m.group(1))
+    m = RE_MSP_RATING.search(xmp_str)
+    if m:
+        return _msp_to_stars(int(m.group(1)))
     return None
 
+
+def _keywords_from_regex(xmp_str):
+    """Keywords über die schnellen Regex-Pfade (kann leer ausgehen)."""
+    keywords = set()
+    for bag in RE_DC_SUBJECT.findall(xmp_str):
+        for li in RE_RDF_LI.findall(bag):
+            keywords.add(li.strip().upper())
+    m = RE_XMP_KEYWORDS.search(xmp_str)
+    if m and m.group(1):
+        _add_keyword_attr(m.group(1), keywords)
+    return keywords
+
+
+def _rating_from_tree(xml):
+    """Fallback über den geparsten Baum für ungewöhnliche Namespace-Präfixe."""
+    for desc in xml.findall(RDF_DESCRIPTION_PATH):
+        rating = desc.attrib.get(XMP_RATING_ATTR)
+        if rating:
+            return int(rating)
+        ms_rating = desc.attrib.get(MSP_RATING_ATTR)
+        if ms_rating:
+            return _msp_to_stars(int(ms_rating))
+    return 0
+
+
+def _keywords_from_tree(xml):
+    """Fallback über den geparsten Baum für ungewöhnliche Namespace-Präfixe."""
+    keywords = set()
+    for bag in xml.findall(DC_SUBJECT_PATH):
+        for li in bag.findall(RDF_LI_PATH):
+            keywords.add(li.text.strip().upper())
+    for desc in xml.findall(RDF_DESCRIPTION_PATH):
+        kw = desc.attrib.get(XMP_KEYWORDS_ATTR)
+        if kw:
+            _add_keyword_attr(kw, keywords)
+    return keywords
+
+
+def parse_xmp(xmp_str):
+    """Bewertung und Keywords in einem Durchgang aus dem XMP lesen.
+
+    Greifen beide Regex-Pfade nicht (ungewöhnliche Präfixe), wird der
+    Block genau einmal als Baum geparst statt zweimal wie bei getrennten
+    get_xmp_rating/get_xmp_keywords-Aufrufen.
+    """
+    if not xmp_str:
+        return 0, set()
+    stars = _rating_from_regex(xmp_str)
+    keywords = _keywords_from_regex(xmp_str)
+    if stars is None or not keywords:
+        xml = _parse_xmp_tree(xmp_str)
+        if xml is not None:
+            if stars is None:
+                stars = _rating_from_tree(xml)
+            if not keywords:
+                keywords = _keywords_from_tree(xml)
+    return stars or 0, keywords
+
+
 def get_xmp_rating(xmp_str):
     """Extract star rating from XMP XML (Adobe/Windows)."""
     if not xmp_str:
         return 0
-    try:
-        for prefix, ns in NAMESPACES.items():
-            ElementTree.register_namespace(prefix, ns)
-        xml = ElementTree.fromstring(xmp_str)
-        for desc in xml.findall(".//{http://www.w3.org/1999/02/22-rdf-syntax-ns#}Description"):
-            rating = desc.attrib.get(f"{{{NAMESPACES['xmp']}}}Rating")
-            if rating:
-                return int(rating)
-            ms_rating = desc.attrib.get(f"{{{NAMESPACES['msp']}}}Rating")
-            if ms_rating:
-                val = int(ms_rating)
-                if val <= 1: return 1
-                elif val <= 25: return 2
-                elif val <= 50: return 3
-                elif val <= 75: return 4
-                else: return 5
-        return 0
-    except Exception as e:
-        logger.debug(f"XMP parse error: {e}")
-        return 0
+    stars = _rating_from_regex(xmp_str)
+    if stars is not None:
+        return stars
+    xml = _parse_xmp_tree(xmp_str)
+    return _rating_from_tree(xml) if xml is not None else 0
+
 
 def get_xmp_keywords(xmp_str):
     """Extract keywords (dc:subject, xmp:Keywords) from XMP."""
-    keywords = set()
     if not xmp_str:
+        return set()
+    keywords = _keywords_from_regex(xmp_str)
+    if keywords:
         return keywords
+    xml = _parse_xmp_tree(xmp_str)
+    return _keywords_from_tree(xml) if xml is not None else keywords
+
+EXIF_TAG_DATETIME = 306
+EXIF_TAG_DATETIME_ORIGINAL = 36867
+EXIF_TAG_DATETIME_DIGITIZED = 36868
+EXIF_TAG_EXIF_IFD = 34665
+
+
+def _parse_tiff_datetime(tiff):
+    """Extract the best DateTime tag from a TIFF/Exif blob (no full decode)."""
+    if tiff[:2] == b'II':
+        endian = '<'
+    elif tiff[:2] == b'MM':
+        endian = '>'
+    else:
+        return None
+    (ifd_offset,) = struct.unpack(endian + 'I', tiff[4:8])
+    found = {}
+
+    def scan_ifd(offset):
+        if offset + 2 > len(tiff):
+            return None
+        (count,) = struct.unpack(endian + 'H', tiff[offset:offset + 2])
+        exif_ifd = None
+        for i in range(count):
+            entry = tiff[offset + 2 + i * 12:offset + 14 + i * 12]
+            if len(entry) < 12:
+                break
+            tag, typ, n = struct.unpack(endian + 'HHI', entry[:8])
+            if tag == EXIF_TAG_EXIF_IFD:
+                (exif_ifd,) = struct.unpack(endian + 'I', entry[8:12])
+            elif tag in (EXIF_TAG_DATETIME, EXIF_TAG_DATETIME_ORIGINAL,
+                         EXIF_TAG_DATETIME_DIGITIZED) and typ == 2 and n <= 32:
+                if n <= 4:
+                    raw = entry[8:8 + n]
+                else:
+                    (val_off,) = struct.unpack(endian + 'I', entry[8:12])
+                    raw = tiff[val_off:val_off + n]
+                found[tag] = raw.rstrip(b'\x00').decode('ascii', 'ignore')
+        return exif_ifd
+
+    exif_ifd = scan_ifd(ifd_offset)
+    if exif_ifd:
+        scan_ifd(exif_ifd)
+
+    for tag in (EXIF_TAG_DATETIME_ORIGINAL, EXIF_TAG_DATETIME_DIGITIZED, EXIF_TAG_DATETIME):
+        value = found.get(tag)
+        if value:
+            # Festes Format 'YYYY:MM:DD HH:MM:SS' – int() auf fixen Offsets
+            # spart das Format-Parsing und den Lock in _strptime pro Bild
+            try:
+                return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                int(value[11:13]), int(value[14:16]), int(value[17:19]))
+            except ValueError:
+                continue
+    return None
+
+
+def read_exif_datetime(file_path):
+    """Read the Exif timestamp straight from the JPEG APP1 segment.
+
+    Walks the marker table only — no PIL, no pixel data read.
+    """
     try:
-        xml = ElementTree.fromstring(xmp_str)
-        for bag in xml.findall(".//{http://purl.org/dc/elements/1.1/}subject"):
-            for li in bag.findall(".//{http://www.w3.org/1999/02/22-rdf-syntax-ns#}li"):
-                keywords.add(li.text.strip().upper())
-        for desc in xml.findall(".//{http://www.w3.org/1999/02/22-rdf-syntax-ns#}Description"):
-            kw = desc.attrib.get(f"{{{NAMESPACES['xmp']}}}Keywords")
-            if kw:
-                for sep in [';', ',', '|']:
-                    if sep in kw:
-                        keywords.update(k.strip().upper() for k in kw.split(sep))
-                        break
+        with open(file_path, 'rb') as f:
+            if f.read(2) != b'\xff\xd8':
+                return None
+            while True:
+                header = f.read(4)
+                if len(header) < 4 or header[0] != 0xFF:
+                    return None
+                code = header[1]
+                if code == 0xDA:  # SOS: Bilddaten beginnen, keine Metadaten mehr
+                    return None
+                (length,) = struct.unpack('>H', header[2:4])
+                if code == 0xE1:
+                    payload = f.read(length - 2)
+                    if payload.startswith(b'Exif\x00\x00'):
+                        return _parse_tiff_datetime(payload[6:])
                 else:
-                    keywords.add(kw.strip().upper())
-        return keywords
+                    f.seek(length - 2, 1)
     except Exception as e:
-        logger.debug(f"XMP keyword error: {e}")
-        return keywords
+        logger.debug("EXIF read error for %s: %s", file_path, e)
+        return None
+
 
 def get_exif_date(file_path):
+    dt = read_exif_datetime(file_path)
+    if dt is not None:
+        return dt
     try:
         return datetime.fromtimestamp(os.path.getmtime(file_path))
     except Exception:
         return None
 
-def matches_criteria(filepath, rating=None, keywords=None, year=None, month=None):
-    xmp_str = extract_xmp(filepath)
-    stars = get_xmp_rating(xmp_str)
-    kws = get_xmp_keywords(xmp_str)
-    dt = get_exif_date(filepath)
+def check_criteria(stars, kws, dt, rating=None, keywords=None, year=None, month=None):
+    """Prüft die Filterkriterien auf bereits gelesenen Werten; keywords muss
+    ein normalisiertes (großgeschriebenes) frozenset sein, siehe
+    normalize_keywords."""
     if rating is not None and stars < rating:
         return False
-    if keywords:
-        if not any(kw.upper() in kws for kw in keywords):
-            return False
+    if keywords and keywords.isdisjoint(kws):
+        return False
     if (year or month) and dt:
         if year and dt.year != year:
             return False
@@ -116,15 +356,232 @@ def matches_criteria(filepath, rating=None, keywords=None, year=None, month=None
             return False
     return True
 
+def matches_criteria(filepath, rating=None, keywords=None, year=None, month=None):
+    """Wie check_criteria, liest die Metadaten aber selbst aus der Datei."""
+    xmp_str = extract_xmp(filepath)
+    stars, kws = parse_xmp(xmp_str)
+    return check_criteria(stars, kws, get_exif_date(filepath),
+                          rating=rating, keywords=keywords, year=year, month=month)
+
+def normalize_keywords(keywords):
+    """Normalisiert die Keyword-Filter einmal pro Lauf statt pro Bild."""
+    return frozenset(kw.upper() for kw in keywords) if keywords else None
+
+
+def analyze_photo(file_path, rating=None, keywords=None, year=None, month=None):
+    """Analysiert ein Bild (XMP + Datum) und prüft die Kriterien.
+
+    Läuft als Pool-Worker; gibt (Pfad, Sterne, Keywords, Datum, Treffer) zurück.
+    """
+    xmp_str = extract_xmp(file_path)
+    stars, kws = parse_xmp(xmp_str)
+    dt = get_exif_date(file_path)
+    # Kriterien direkt auf den schon gelesenen Werten prüfen – die Datei
+    # wird pro Lauf genau einmal geöffnet
+    matched = check_criteria(stars, kws, dt, rating=rating, keywords=keywords, year=year, month=month)
+    return file_path, stars, kws, dt, matched
+
+
+class ExifToolService:
+    """Hält einen exiftool-Prozess offen (-stay_open True).
+
+    Der Prozessstart von exiftool dominiert sonst die Laufzeit; über die
+    Kommandodatei (-@ -) kostet ein Batch von BATCH_SIZE Pfaden nur noch
+    einen -execute-Roundtrip.
+    """
+
+    BATCH_SIZE = 256
+    _TAG_ARGS = ("-j", "-fast2", "-XMP:Rating", "-Subject", "-Keywords",
+                 "-DateTimeOriginal")
+
+    def __init__(self):
+        self._proc = subprocess.Popen(
+            ["exiftool", "-stay_open", "True", "-@", "-"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.stdin.write(b"-stay_open\nFalse\n")
+            self._proc.stdin.flush()
+            self._proc.wait()
+
+    def read_batch(self, paths):
+        """Liefert pro Pfad das Metadaten-Dict (leer bei Lesefehlern)."""
+        cmd = "\n".join(self._TAG_ARGS + tuple(paths)) + "\n-execute\n"
+        self._proc.stdin.write(cmd.encode())
+        self._proc.stdin.flush()
+        chunks = []
+        while True:
+            line = self._proc.stdout.readline()
+            if not line or line.startswith(b"{ready}"):
+                break
+            chunks.append(line)
+        try:
+            entries = json.loads(b"".join(chunks)) if chunks else []
+        except ValueError:
+            entries = []
+        by_path = {e.get("SourceFile"): e for e in entries}
+        return [by_path.get(p, {}) for p in paths]
+
+
+def _exiftool_values(file_path, meta):
+    """Übersetzt ein exiftool-JSON-Dict in (Sterne, Keywords, Datum)."""
+    try:
+        stars = int(meta.get("Rating") or 0)
+    except (TypeError, ValueError):
+        stars = 0
+    kws = set()
+    for key in ("Subject", "Keywords"):
+        val = meta.get(key)
+        if isinstance(val, str):
+            _add_keyword_attr(val, kws)
+        elif val:
+            kws.update(str(v).strip().upper() for v in val)
+    dt = None
+    raw = meta.get("DateTimeOriginal")
+    if raw:
+        try:
+            dt = datetime(int(raw[0:4]), int(raw[5:7]), int(raw[8:10]),
+                          int(raw[11:13]), int(raw[14:16]), int(raw[17:19]))
+        except ValueError:
+            pass
+    if dt is None:
+        try:
+            dt = datetime.fromtimestamp(os.path.getmtime(file_path))
+        except OSError:
+            pass
+    return stars, kws, dt
+
+
+def iter_exiftool_results(files, rating=None, keywords=None, year=None, month=None):
+    """Wie der analyze_photo-Pool, nur über exiftool-Batches (--use-exiftool)."""
+    service = ExifToolService()
+
+    def flush(batch):
+        for fp, meta in zip(batch, service.read_batch(batch)):
+            stars, kws, dt = _exiftool_values(fp, meta)
+            matched = check_criteria(stars, kws, dt, rating=rating,
+                                     keywords=keywords, year=year, month=month)
+            yield fp, stars, kws, dt, matched
+
+    try:
+        batch = []
+        for fp in files:
+            batch.append(fp)
+            if len(batch) >= ExifToolService.BATCH_SIZE:
+                yield from flush(batch)
+                batch = []
+        if batch:
+            yield from flush(batch)
+    finally:
+        service.close()
+
+
+ANALYZE_BATCH_SIZE = 64  # Dateien pro Pool-Task; amortisiert den IPC-Overhead
+
+
+def _analyze_batch(analyze, batch):
+    """Worker-Seite: analysiert einen Schwung Pfade in einem Rutsch."""
+    return [analyze(fp) for fp in batch]
+
+
+def _iter_analysis(executor, analyze, files, max_workers):
+    """Reicht Batches mit begrenztem Fenster in den Pool und liefert Ergebnisse.
+
+    executor.map würde erst den kompletten Verzeichnis-Walk konsumieren und
+    für jede Datei ein Future anlegen; hier hängen höchstens zwei Batches
+    pro Worker gleichzeitig in der Queue, der Rest bleibt im Generator.
+    """
+    batches = iter(lambda: list(itertools.islice(files, ANALYZE_BATCH_SIZE)), [])
+    window = max(2 * (max_workers or 1), 2)
+    pending = deque(
+        executor.submit(_analyze_batch, analyze, batch)
+        for batch in itertools.islice(batches, window)
+    )
+    while pending:
+        results = pending.popleft().result()
+        for batch in itertools.islice(batches, 1):
+            pending.append(executor.submit(_analyze_batch, analyze, batch))
+        yield from results
+
+
+def _walk_jpegs(directory):
+    """Rekursiver os.scandir-Walk; DirEntry spart ein stat() pro Eintrag.
+
+    Nicht lesbare Verzeichnisse oder Einträge werden wie früher bei
+    os.walk übersprungen statt den ganzen Scan abzubrechen.
+    """
+    try:
+        entries = os.scandir(directory)
+    except OSError as e:
+        logger.warning("Verzeichnis %s nicht lesbar: %s", directory, e)
+        return
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _walk_jpegs(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    dot = entry.name.rfind('.')
+                    if (dot != -1 and entry.name[dot:].lower() in SUPPORTED_EXT_SET
+                            and entry.stat().st_size >= MIN_FILE_SIZE):
+                        yield entry.path
+            except OSError as e:
+                logger.warning("Eintrag %s übersprungen: %s", entry.path, e)
+
+
 def find_jpeg_files(src_dir):
-    """Recursively find all JPEGs in src_dir."""
-    files = []
-    for root, dirs, fnames in os.walk(src_dir):
-        for f in fnames:
-            fp = Path(root) / f
-            if fp.suffix.lower() in SUPPORTED_FORMATS:
-                files.append(str(fp))
-    return files
+    """Recursively yield all JPEGs in src_dir (lazy, see _walk_jpegs)."""
+    return _walk_jpegs(str(src_dir))
+
+def _inode_key(file_path):
+    """Sortierschlüssel (Gerät, Inode) für physisch benachbarte Lesezugriffe."""
+    try:
+        st = os.stat(file_path)
+        return (st.st_dev, st.st_ino)
+    except OSError:
+        return (0, 0)
+
+
+COPY_CHUNK = 1 << 30  # copy_file_range/sendfile kopieren bis zu 1 GiB pro Syscall
+
+
+def _fast_copy(src, dst):
+    """Kopiert Dateiinhalt im Kernel statt durch einen Python-Puffer.
+
+    os.copy_file_range bleibt komplett im Kernel und legt auf XFS/Btrfs
+    sogar Reflinks an; os.sendfile ist der Zero-Copy-Fallback. Erst wenn
+    beides scheitert (z.B. andere Dateisysteme, ältere Kernel), fällt die
+    Funktion auf shutil.copyfileobj mit großem Puffer zurück. Metadaten
+    werden wie bei shutil.copy2 per copystat übernommen.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        sfd, dfd = fsrc.fileno(), fdst.fileno()
+        done = False
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while os.copy_file_range(sfd, dfd, COPY_CHUNK):
+                    pass
+                done = True
+            except OSError:
+                pass
+        if not done and hasattr(os, 'sendfile'):
+            try:
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+                while os.sendfile(dfd, sfd, None, COPY_CHUNK):
+                    pass
+                done = True
+            except OSError:
+                pass
+        if not done:
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+            shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+    shutil.copystat(src, dst)
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -138,40 +595,84 @@ def main():
     parser.add_argument("-y", "--year", type=int)
     parser.add_argument("-m", "--month", type=int, choices=range(1,13))
     parser.add_argument("--dry-run", action="store_true", help="Show matches, do not copy")
+    parser.add_argument("--use-exiftool", action="store_true",
+                        help="Read metadata via a persistent exiftool batch process")
     args = parser.parse_args()
 
+    if args.use_exiftool and shutil.which("exiftool") is None:
+        parser.error("--use-exiftool requires the exiftool binary on PATH")
+
     src_dir = Path(args.source)
     if not src_dir.is_dir():
         print("Source directory does not exist!")
         sys.exit(1)
 
+    # Pfade strömen direkt aus dem Verzeichnis-Walk in den Pool; das
+    # begrenzte Fenster in _iter_analysis sorgt dafür, dass der Walk auch
+    # wirklich nur so schnell konsumiert wird, wie die Worker nachkommen
     files = find_jpeg_files(src_dir)
 
+    # Analyse parallel über alle Kerne; jedes Bild ist unabhängig
+    kw_filter = normalize_keywords(args.keyword)
+    analyze = functools.partial(analyze_photo, rating=args.rating,
+                                keywords=kw_filter,
+                                year=args.year, month=args.month)
     matches = []
-    for fp in tqdm(files, desc="Scanning", unit="file") if tqdm else files:
-        xmp_str = extract_xmp(fp)
-        stars = get_xmp_rating(xmp_str)
-        kws = get_xmp_keywords(xmp_str)
-        dt = get_exif_date(fp)
-        logger.info(f"{Path(fp).name}: Sterne={stars}, Keywords={kws}, Datum={dt}")
-        if matches_criteria(fp, rating=args.rating, keywords=args.keyword, year=args.year, month=args.month):
-            matches.append(fp)
+    scanned = 0
+    workers = os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if args.use_exiftool:
+            # Worker werden erst beim ersten submit gestartet; der Pool
+            # bleibt hier also ungenutzt und kostet nichts
+            results = iter_exiftool_results(files, rating=args.rating,
+                                            keywords=kw_filter,
+                                            year=args.year, month=args.month)
+        else:
+            results = _iter_analysis(executor, analyze, files, workers)
+        if tqdm:
+            results = tqdm(results, desc="Scanning", unit="file")
+        for fp, stars, kws, dt, matched in results:
+            scanned += 1
+            logger.info(f"{fp.rpartition(os.sep)[2]}: Sterne={stars}, Keywords={kws}, Datum={dt}")
+            if matched:
+                matches.append(fp)
+    logger.info(f"{scanned} Dateien geprüft")
 
     print(f"\nGefundene Favoriten (Kopie in '{args.destination}'): {len(matches)}")
     if not args.dry_run:
-        Path(args.destination).mkdir(parents=True, exist_ok=True)
+        dest_dir = Path(args.destination)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+
+        # Nach Inode sortiert kopieren: gruppiert die Lesezugriffe physisch
+        # benachbart und spart Seeks auf Magnetplatten
+        matches.sort(key=_inode_key)
+
+        # Zielnamen vorab in einem seriellen Durchlauf auflösen: ein
+        # einziges listdir statt eines exists()-Syscalls pro Kandidat
+        existing = set(os.listdir(dest_dir))
+        dest_str = str(dest_dir)
+        jobs = []
         for fp in matches:
-            src_file = Path(fp)
-            dest_file = Path(args.destination) / src_file.name
-            if dest_file.exists():
+            # Stringoperationen statt Path-Objekten: keine Allokation von
+            # Flavour/Parts pro Treffer
+            name = fp.rpartition(os.sep)[2]
+            if name in existing:
                 counter = 1
-                stem = dest_file.stem
-                suffix = dest_file.suffix
-                while dest_file.exists():
-                    dest_file = Path(args.destination) / f"{stem}_{counter}{suffix}"
+                stem, suffix = os.path.splitext(name)
+                while f"{stem}_{counter}{suffix}" in existing:
                     counter += 1
-            shutil.copy2(fp, dest_file)
-        print(f"{len(matches)} Dateien kopiert!")
+                name = f"{stem}_{counter}{suffix}"
+            existing.add(name)
+            jobs.append((fp, os.path.join(dest_str, name)))
+
+        # Kopieren ist I/O-gebunden – Threads überlappen die Syscalls
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = executor.map(lambda job: _fast_copy(job[0], job[1]), jobs)
+            if tqdm:
+                results = tqdm(results, total=len(jobs), desc="Kopieren", unit="file")
+            for _ in results:
+                pass
+        print(f"{len(jobs)} Dateien kopiert!")
 
 if __name__ == "__main__":
     main()
@@ -1,17 +1,25 @@
 """
-Media File Sorter - Improved Version
+Media File Sorter
 
 Sorts media files (JPG, JPEG, PNG, MOV, MP4) into subdirectories based on metadata timestamps.
 Creates directories in YYYY-MM-DD format and renames files with timestamp prefixes.
 
-Usage: python sort-media-improved.py <src_dir> [dest_dir] [--dry-run]
+Usage: python sort-media.py <src_dir> [dest_dir] [--dry-run]
 """
 
 import sys
 import os
-import glob
+import functools
+import atexit
+import itertools
+import mmap
+import shelve
 import shutil
+import struct
 import logging
+import logging.handlers
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Tuple, List
@@ -33,6 +41,12 @@ except ImportError:
 EXIF_TAG_DATETIME = 306  # DateTime image was changed
 EXIF_TAG_DATETIME_ORIGINAL = 36867  # DateTime original image was taken
 EXIF_TAG_DATETIME_DIGITIZED = 36868  # DateTime image was digitized
+EXIF_TAG_EXIF_IFD = 34665  # Pointer to the Exif sub-IFD
+
+DATETIME_TAGS = frozenset((EXIF_TAG_DATETIME, EXIF_TAG_DATETIME_ORIGINAL,
+                           EXIF_TAG_DATETIME_DIGITIZED))
+EXIF_APP1_SIG = b'Exif\x00\x00'
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
 
 MIN_VALID_YEAR = 1970
 MAX_VALID_YEAR = datetime.now().year + 1
@@ -40,25 +54,211 @@ MAX_VALID_YEAR = datetime.now().year + 1
 SUPPORTED_IMAGE_FORMATS = ['jpg', 'jpeg', 'png']
 SUPPORTED_VIDEO_FORMATS = ['mov', 'mp4']
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('media_sorter.log'),
-        logging.StreamHandler()
-    ]
-)
+# Lowercased extension -> handler type, for one-pass classification
+EXT_TO_TYPE = {ext: 'image' for ext in SUPPORTED_IMAGE_FORMATS}
+EXT_TO_TYPE.update({ext: 'video' for ext in SUPPORTED_VIDEO_FORMATS})
+
+# Setup logging: per-file records are buffered in memory and written to
+# the log file in batches of 1024 instead of one locked write syscall per
+# line; errors flush the buffer immediately. The console only shows
+# warnings and errors, the full INFO log lives in media_sorter.log.
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_file_handler = logging.FileHandler('media_sorter.log')
+_file_handler.setFormatter(_log_formatter)
+_buffered_handler = logging.handlers.MemoryHandler(
+    capacity=1024, flushLevel=logging.ERROR, target=_file_handler)
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(_log_formatter)
+_console_handler.setLevel(logging.WARNING)
+logging.basicConfig(level=logging.INFO,
+                    handlers=[_buffered_handler, _console_handler])
 logger = logging.getLogger(__name__)
+atexit.register(_buffered_handler.close)  # flush the tail of the buffer
+
+
+def _parse_tiff_timestamp(tiff: bytes) -> Optional[str]:
+    """Pull the best DateTime* string out of a TIFF/Exif blob (no full decode)."""
+    if tiff[:2] == b'II':
+        endian = '<'
+    elif tiff[:2] == b'MM':
+        endian = '>'
+    else:
+        return None
+    (ifd_offset,) = struct.unpack_from(endian + 'I', tiff, 4)
+    found = {}
+
+    def scan_ifd(offset: int) -> Optional[int]:
+        if offset + 2 > len(tiff):
+            return None
+        (count,) = struct.unpack_from(endian + 'H', tiff, offset)
+        exif_ifd = None
+        for i in range(count):
+            base = offset + 2 + i * 12
+            if base + 12 > len(tiff):
+                break
+            tag, typ, n = struct.unpack_from(endian + 'HHI', tiff, base)
+            if tag > EXIF_TAG_DATETIME_DIGITIZED:
+                # IFD entries are sorted by tag; nothing of interest follows
+                break
+            if tag == EXIF_TAG_EXIF_IFD:
+                (exif_ifd,) = struct.unpack_from(endian + 'I', tiff, base + 8)
+            elif tag in DATETIME_TAGS and typ == 2 and n >= 19:
+                (value_off,) = struct.unpack_from(endian + 'I', tiff, base + 8)
+                value = tiff[value_off:value_off + 19]
+                if len(value) == 19:
+                    found[tag] = value.decode('ascii', errors='replace')
+        return exif_ifd
+
+    exif_ifd = scan_ifd(ifd_offset)
+    if exif_ifd and EXIF_TAG_DATETIME_ORIGINAL not in found:
+        scan_ifd(exif_ifd)
+    for tag in (EXIF_TAG_DATETIME_ORIGINAL, EXIF_TAG_DATETIME, EXIF_TAG_DATETIME_DIGITIZED):
+        if tag in found:
+            return found[tag]
+    return None
+
+
+def _read_jpeg_exif_timestamp(f) -> Optional[str]:
+    """Walk the JPEG marker table to the Exif APP1 segment (reads a few KB)."""
+    while True:
+        header = f.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return None
+        code = header[1]
+        if code == 0xDA:  # Start of scan: pixel data, no more metadata
+            return None
+        (length,) = struct.unpack('>H', header[2:4])
+        if code == 0xE1:
+            payload = f.read(length - 2)
+            if payload.startswith(EXIF_APP1_SIG):
+                return _parse_tiff_timestamp(payload[6:])
+        else:
+            f.seek(length - 2, 1)
+
+
+def _read_png_exif_timestamp(f) -> Optional[str]:
+    """Walk PNG chunks to the eXIf chunk, stopping at pixel data."""
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        length, chunk_type = struct.unpack('>I4s', header)
+        if chunk_type == b'eXIf':
+            return _parse_tiff_timestamp(f.read(length))
+        if chunk_type == b'IDAT':  # Metadata chunks precede pixel data
+            return None
+        f.seek(length + 4, 1)  # Skip payload + CRC
+
+
+def _read_exif_timestamp_raw(filename: str) -> Optional[str]:
+    """Read the raw 'YYYY:MM:DD HH:MM:SS' Exif string without Pillow."""
+    with open(filename, 'rb') as f:
+        magic = f.read(8)
+        if magic[:2] == b'\xff\xd8':
+            f.seek(2)
+            return _read_jpeg_exif_timestamp(f)
+        if magic == PNG_MAGIC:
+            return _read_png_exif_timestamp(f)
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _image_timestamps_cached(filename: str, mtime_ns: int, size: int) -> Tuple[Optional[str], Optional[str]]:
+    """
+    EXIF parse behind an LRU cache keyed by (path, mtime, size).
+    The cache holds only the two small result strings, never Image objects.
+    """
+    try:
+        # Fast path: walk only the JPEG APP1 / PNG eXIf segment instead of
+        # handing the whole file to Pillow
+        timestamp_str = None
+        try:
+            timestamp_str = _read_exif_timestamp_raw(filename)
+        except (OSError, struct.error):
+            pass
+
+        if not timestamp_str:
+            # Fallback: Pillow for anything the raw parser didn't cover.
+            # Image.open reads lazily; getexif() right away, then close
+            # without entering the context manager
+            img = Image.open(filename)
+            try:
+                exif_data = img.getexif()
+            finally:
+                img.close()
+
+            if not exif_data:
+                logger.warning(f"No EXIF data found in {Path(filename).name}")
+                return None, None
+
+            # Try multiple EXIF tags in priority order
+            for tag in (EXIF_TAG_DATETIME_ORIGINAL, EXIF_TAG_DATETIME, EXIF_TAG_DATETIME_DIGITIZED):
+                timestamp_str = exif_data.get(tag)
+                if timestamp_str:
+                    break
+
+        if not timestamp_str:
+            logger.warning(f"No timestamp tags found in {Path(filename).name}")
+            return None, None
+
+        # Parse timestamp: the Exif format is fixed-width
+        # 'YYYY:MM:DD HH:MM:SS', so slicing at fixed offsets replaces the
+        # much heavier strptime/strftime roundtrip
+        try:
+            year = int(timestamp_str[0:4])
+            # Constructing the datetime validates the field ranges for
+            # real (Feb 31 must fail like it did under strptime); only
+            # the formatted output still comes from the cheap slices.
+            datetime(year, int(timestamp_str[5:7]), int(timestamp_str[8:10]),
+                     int(timestamp_str[11:13]), int(timestamp_str[14:16]),
+                     int(timestamp_str[17:19]))
+        except (TypeError, ValueError, IndexError):
+            logger.error(f"Invalid timestamp format in {Path(filename).name}: {timestamp_str}")
+            return None, None
+
+        if not (MIN_VALID_YEAR <= year <= MAX_VALID_YEAR):
+            logger.warning(f"Invalid date in {Path(filename).name}: {year}")
+            return None, None
+
+        short_date = f"{timestamp_str[0:4]}-{timestamp_str[5:7]}-{timestamp_str[8:10]}"
+        long_datetime = (f"{short_date}_{timestamp_str[11:13]}"
+                         f"-{timestamp_str[14:16]}-{timestamp_str[17:19]}")
+
+        return short_date, long_datetime
+
+    except Exception as e:
+        logger.error(f"Error reading EXIF from {Path(filename).name}: {e}")
+        return None, None
 
 
 class MediaSorter:
     """Main class for sorting media files by metadata timestamps."""
     
-    def __init__(self, src_dir: str, dest_dir: str, dry_run: bool = False):
+    def __init__(self, src_dir: str, dest_dir: str, dry_run: bool = False,
+                 max_concurrency: Optional[int] = None):
         self.src_dir = src_dir
         self.dest_dir = dest_dir
         self.dry_run = dry_run
+        self.max_concurrency = max_concurrency or os.cpu_count()
+        # One cached listing per target directory for unique-name checks
+        self._dir_listing_cache = {}
+        # Date directories already ensured this run (one makedirs per dir)
+        self._created_dirs = set()
+        # Same-device moves are renames and consume no space; only
+        # cross-device moves need disk-space tracking
+        try:
+            self._same_device = os.stat(src_dir).st_dev == os.stat(dest_dir).st_dev
+        except OSError:
+            self._same_device = False
+        # Default invocation sorts in place (dest_dir defaults to src_dir);
+        # every move is then an in-directory rename and the disk-space
+        # bookkeeping can be bypassed without even a method call
+        self._in_place = os.path.realpath(src_dir) == os.path.realpath(dest_dir)
+        # Bind the move operation once: same-filesystem moves go straight to
+        # os.rename, everything else keeps shutil.move's copy fallback
+        self._move = os.rename if (self._same_device or self._in_place) else shutil.move
+        self._free_bytes = None  # statvfs result, queried lazily once
+        self._meta_cache = None  # persistent timestamp cache, opened in run()
         self.stats = {
             'processed': 0,
             'failed': 0,
@@ -66,12 +266,6 @@ class MediaSorter:
             'moved': 0
         }
         
-    def case_insensitive_glob(self, pattern: str) -> List[str]:
-        """Perform case-insensitive file globbing."""
-        def either(c):
-            return f'[{c.lower()}{c.upper()}]' if c.isalpha() else c
-        return glob.glob(''.join(map(either, pattern)))
-    
     def validate_date(self, date_obj: datetime) -> bool:
         """Validate that date is within reasonable bounds."""
         if date_obj is None:
@@ -82,238 +276,363 @@ class MediaSorter:
         """
         Extract timestamp from image EXIF data.
         Returns: (short_date, long_datetime) as ('YYYY-MM-DD', 'YYYY-MM-DD_HH-MM-SS')
+
+        Results are memoized per (path, mtime, size), so repeated lookups
+        (e.g. a dry-run followed by the real run in one process) parse the
+        EXIF block only once.
         """
         try:
-            with Image.open(filename) as img:
-                # Use modern getexif() instead of deprecated _getexif()
-                exif_data = img.getexif()
-                
-                if not exif_data:
-                    logger.warning(f"No EXIF data found in {Path(filename).name}")
-                    return None, None
-                
-                # Try multiple EXIF tags in priority order
-                timestamp_str = None
-                for tag in [EXIF_TAG_DATETIME_ORIGINAL, EXIF_TAG_DATETIME, EXIF_TAG_DATETIME_DIGITIZED]:
-                    timestamp_str = exif_data.get(tag)
-                    if timestamp_str:
-                        break
-                
-                if not timestamp_str:
-                    logger.warning(f"No timestamp tags found in {Path(filename).name}")
-                    return None, None
-                
-                # Parse timestamp
-                try:
-                    dt = datetime.strptime(timestamp_str, '%Y:%m:%d %H:%M:%S')
-                except ValueError:
-                    logger.error(f"Invalid timestamp format in {Path(filename).name}: {timestamp_str}")
-                    return None, None
-                
-                if not self.validate_date(dt):
-                    logger.warning(f"Invalid date in {Path(filename).name}: {dt.year}")
-                    return None, None
-                
-                short_date = dt.strftime('%Y-%m-%d')
-                long_datetime = dt.strftime('%Y-%m-%d_%H-%M-%S')
-                
-                return short_date, long_datetime
-                
-        except Exception as e:
+            stat = os.stat(filename)
+        except OSError as e:
             logger.error(f"Error reading EXIF from {Path(filename).name}: {e}")
             return None, None
+        return _image_timestamps_cached(filename, stat.st_mtime_ns, stat.st_size)
     
     def get_video_timestamps(self, filename: str) -> Tuple[Optional[str], Optional[str]]:
         """
         Extract timestamp from video metadata (MOV/MP4).
         Returns: (short_date, long_datetime) as ('YYYY-MM-DD', 'YYYY-MM-DD_HH-MM-SS')
+
+        The file is mapped read-only and the top-level atoms are walked by
+        offset, so finding a trailing moov costs no read syscall per atom.
+        Handles 64-bit extended atom sizes (size == 1) and atoms that run
+        to end of file (size == 0), which the old 8-byte-step reader broke on.
         """
-        import struct
-        
-        ATOM_HEADER_SIZE = 8
         EPOCH_ADJUSTER = 2082844800  # Unix to QuickTime epoch difference
-        
+
+        file_name = Path(filename).name
         try:
-            with open(filename, 'rb') as f:
-                # Search for moov atom
-                while True:
-                    atom_header = f.read(ATOM_HEADER_SIZE)
-                    if not atom_header or len(atom_header) < ATOM_HEADER_SIZE:
-                        logger.warning(f"No moov atom found in {Path(filename).name}")
-                        return None, None
-                    
-                    if atom_header[4:8] == b'moov':
+            with open(filename, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                file_size = len(mm)
+                offset = 0
+                moov_off = None
+                while offset + 8 <= file_size:
+                    atom_size, atom_type = struct.unpack_from('>I4s', mm, offset)
+                    header_size = 8
+                    if atom_size == 1:  # 64-bit extended size follows
+                        if offset + 16 > file_size:
+                            break
+                        (atom_size,) = struct.unpack_from('>Q', mm, offset + 8)
+                        header_size = 16
+                    elif atom_size == 0:  # Atom runs to end of file
+                        atom_size = file_size - offset
+                    if atom_size < header_size:
+                        break
+                    if atom_type == b'moov':
+                        moov_off = offset + header_size
                         break
-                    else:
-                        atom_size = struct.unpack('>I', atom_header[0:4])[0]
-                        f.seek(atom_size - 8, 1)
-                
+                    offset += atom_size
+
+                if moov_off is None or moov_off + 8 > file_size:
+                    logger.warning(f"No moov atom found in {file_name}")
+                    return None, None
+
                 # Found moov, look for mvhd
-                atom_header = f.read(ATOM_HEADER_SIZE)
-                if atom_header[4:8] == b'cmov':
-                    logger.error(f"Compressed moov atom not supported in {Path(filename).name}")
+                child_type = mm[moov_off + 4:moov_off + 8]
+                if child_type == b'cmov':
+                    logger.error(f"Compressed moov atom not supported in {file_name}")
                     return None, None
-                elif atom_header[4:8] != b'mvhd':
-                    logger.error(f"Expected mvhd header in {Path(filename).name}")
+                elif child_type != b'mvhd':
+                    logger.error(f"Expected mvhd header in {file_name}")
                     return None, None
-                
-                # Read timestamps
-                f.seek(4, 1)
-                creation_time = struct.unpack('>I', f.read(4))[0] - EPOCH_ADJUSTER
-                dt = datetime.fromtimestamp(creation_time)
-                
+
+                # Read timestamps; mvhd version 1 stores 64-bit times
+                if mm[moov_off + 8] == 1:
+                    (creation_time,) = struct.unpack_from('>Q', mm, moov_off + 12)
+                else:
+                    (creation_time,) = struct.unpack_from('>I', mm, moov_off + 12)
+                dt = datetime.fromtimestamp(creation_time - EPOCH_ADJUSTER)
+
                 if not self.validate_date(dt):
-                    logger.warning(f"Invalid date in {Path(filename).name}: {dt.year}")
+                    logger.warning(f"Invalid date in {file_name}: {dt.year}")
                     return None, None
-                
-                short_date = dt.strftime('%Y-%m-%d')
-                long_datetime = dt.strftime('%Y-%m-%d_%H-%M-%S')
-                
+
+                # f-string field formatting is much cheaper than strftime
+                short_date = f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+                long_datetime = f"{short_date}_{dt.hour:02d}-{dt.minute:02d}-{dt.second:02d}"
+
                 return short_date, long_datetime
-                
+
         except Exception as e:
-            logger.error(f"Error reading video metadata from {Path(filename).name}: {e}")
+            logger.error(f"Error reading video metadata from {file_name}: {e}")
             return None, None
     
-    def get_file_creation_fallback(self, filename: str) -> Tuple[Optional[str], Optional[str]]:
-        """Fallback: use file creation/modification time."""
+    def get_file_creation_fallback(self, filename: str,
+                                   stat_result: Optional[os.stat_result] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Fallback: use file creation/modification time.
+
+        Reuses the stat_result collected during the directory scan when
+        available instead of re-statting the file.
+        """
+        file_name = Path(filename).name
         try:
-            stat = os.stat(filename)
+            stat = stat_result if stat_result is not None else os.stat(filename)
             # Use the earlier of creation or modification time
             timestamp = min(stat.st_ctime, stat.st_mtime)
             dt = datetime.fromtimestamp(timestamp)
+
+            short_date = f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+            long_datetime = f"{short_date}_{dt.hour:02d}-{dt.minute:02d}-{dt.second:02d}"
             
-            short_date = dt.strftime('%Y-%m-%d')
-            long_datetime = dt.strftime('%Y-%m-%d_%H-%M-%S')
-            
-            logger.info(f"Using file timestamp as fallback for {Path(filename).name}")
+            logger.info(f"Using file timestamp as fallback for {file_name}")
             return short_date, long_datetime
         except Exception as e:
-            logger.error(f"Error getting file timestamp for {Path(filename).name}: {e}")
+            logger.error(f"Error getting file timestamp for {file_name}: {e}")
             return None, None
     
     def generate_unique_filename(self, dest_dir: str, base_name: str, extension: str) -> str:
-        """Generate unique filename by adding suffix if needed."""
-        target_path = os.path.join(dest_dir, f"{base_name}.{extension}")
-        
-        if not os.path.exists(target_path):
-            return f"{base_name}.{extension}"
-        
+        """
+        Generate unique filename by adding suffix if needed.
+
+        Collision checks run against one cached os.listdir set per target
+        directory instead of a stat syscall per candidate; every name handed
+        out is added to the cache so later calls in the same run see it.
+        """
+        listing = self._dir_listing_cache.get(dest_dir)
+        if listing is None:
+            try:
+                listing = set(os.listdir(dest_dir))
+            except FileNotFoundError:
+                listing = set()  # Directory not created yet (e.g. dry run)
+            self._dir_listing_cache[dest_dir] = listing
+
+        candidate = f"{base_name}.{extension}"
+        if candidate not in listing:
+            listing.add(candidate)
+            return candidate
+
         # File exists, add counter
         counter = 1
         while True:
             new_name = f"{base_name}_{counter:03d}.{extension}"
-            target_path = os.path.join(dest_dir, new_name)
-            if not os.path.exists(target_path):
+            if new_name not in listing:
                 logger.info(f"Filename collision detected, using {new_name}")
+                listing.add(new_name)
                 return new_name
             counter += 1
             if counter > 999:
                 raise RuntimeError(f"Too many filename collisions for {base_name}")
     
-    def check_disk_space(self, file_path: str) -> bool:
-        """Check if there's enough disk space for the operation."""
+    def check_disk_space(self, file_path: str, file_size: Optional[int] = None) -> bool:
+        """
+        Check if there's enough disk space for the operation.
+
+        statvfs runs once per run; afterwards a running estimate is kept by
+        subtracting each moved file's size. Same-device moves skip the check
+        entirely because a rename consumes no extra space.
+        """
+        if self._same_device:
+            return True
         try:
-            file_size = os.path.getsize(file_path)
-            stat = shutil.disk_usage(self.dest_dir)
-            
+            if file_size is None:
+                file_size = os.path.getsize(file_path)
+            if self._free_bytes is None:
+                self._free_bytes = shutil.disk_usage(self.dest_dir).free
+
             # Require at least 100MB free or 2x file size, whichever is larger
             required_space = max(file_size * 2, 100 * 1024 * 1024)
-            
-            if stat.free < required_space:
-                logger.error(f"Insufficient disk space. Free: {stat.free / (1024**3):.2f} GB")
+
+            if self._free_bytes < required_space:
+                logger.error(f"Insufficient disk space. Free: {self._free_bytes / (1024**3):.2f} GB")
                 return False
+            self._free_bytes -= file_size
             return True
         except Exception as e:
             logger.error(f"Error checking disk space: {e}")
             return False
     
-    def process_file(self, file_path: str, file_type: str) -> bool:
+    def __getstate__(self):
         """
-        Process a single file: extract metadata, create directory, move file.
-        Returns True if successful, False otherwise.
+        Pickle support for the extraction pool: submitting a bound method
+        pickles the whole sorter, and the open shelve (plus the other
+        commit-side state the workers never touch) must not travel along -
+        most dbm backends are unpicklable.
         """
+        state = self.__dict__.copy()
+        state['_meta_cache'] = None
+        state['_dir_listing_cache'] = {}
+        state['_created_dirs'] = set()
+        return state
+
+    def extract_timestamps(self, file_path: str, file_type: str,
+                           stat_result: Optional[os.stat_result] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Compute stage: extract timestamps from metadata (read-only, pool-safe).
+        Returns: (short_date, long_datetime) or (None, None) on failure.
+        """
+        if file_type == 'image':
+            short_date, long_datetime = self.get_image_timestamps(file_path)
+        elif file_type == 'video':
+            short_date, long_datetime = self.get_video_timestamps(file_path)
+        else:
+            logger.error(f"Unknown file type: {file_type}")
+            return None, None
+
+        # Fallback to file creation time if metadata extraction failed
+        if short_date is None or long_datetime is None:
+            logger.info(f"Trying fallback method for {Path(file_path).name}")
+            short_date, long_datetime = self.get_file_creation_fallback(file_path, stat_result)
+
+        return short_date, long_datetime
+
+    def _extract_task(self, task: Tuple[str, str, os.stat_result]) -> Tuple[str, Optional[str], Optional[str]]:
+        """Pool worker wrapper: never raises, so one bad file can't kill the run."""
+        file_path, file_type, stat_result = task
         try:
-            file_name = Path(file_path).name
-            extension = Path(file_path).suffix[1:].lower()  # Remove dot and lowercase
-            
-            # Get timestamps based on file type
-            if file_type == 'image':
-                short_date, long_datetime = self.get_image_timestamps(file_path)
-            elif file_type == 'video':
-                short_date, long_datetime = self.get_video_timestamps(file_path)
-            else:
-                logger.error(f"Unknown file type: {file_type}")
-                return False
-            
-            # Fallback to file creation time if metadata extraction failed
-            if short_date is None or long_datetime is None:
-                logger.info(f"Trying fallback method for {file_name}")
-                short_date, long_datetime = self.get_file_creation_fallback(file_path)
-            
+            short_date, long_datetime = self.extract_timestamps(file_path, file_type, stat_result)
+        except Exception as e:
+            logger.error(f"Error extracting metadata from {Path(file_path).name}: {e}")
+            return file_path, None, None
+        return file_path, short_date, long_datetime
+
+    def _extract_batch(self, batch: List[Tuple[str, str, os.stat_result]]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+        """Run a batch of extraction tasks in one pool round-trip."""
+        try:
+            return [self._extract_task(task) for task in batch]
+        finally:
+            # Pool workers exit via os._exit, which skips the atexit flush;
+            # without this, records buffered in the worker's copy of the
+            # memory handler would be discarded with the process.
+            _buffered_handler.flush()
+
+    def _run_extraction(self, executor, tasks):
+        """
+        Yield extraction results while keeping only a bounded window of
+        batches in flight.
+
+        executor.map would submit every task up front; with the bounded
+        window the commit loop on the main thread acts as the single mover
+        (seeks stay serialized) and naturally applies backpressure to the
+        metadata workers instead of queueing the whole directory.
+        """
+        batch_size = 32
+        window = max(2 * (self.max_concurrency or 1), 2)
+        batches = (tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size))
+        pending = deque()
+        for batch in itertools.islice(batches, window):
+            pending.append(executor.submit(self._extract_batch, batch))
+        while pending:
+            results = pending.popleft().result()
+            for batch in itertools.islice(batches, 1):
+                pending.append(executor.submit(self._extract_batch, batch))
+            yield from results
+
+    def commit_file(self, file_path: str, short_date: Optional[str],
+                    long_datetime: Optional[str],
+                    file_size: Optional[int] = None) -> bool:
+        """
+        Commit stage: create directory and move the file.
+        Runs only on the main thread so unique-filename checks cannot race.
+        """
+        try:
+            # One PurePath per file; name/stem/suffix reuse its parsed parts
+            path = Path(file_path)
+            file_name = path.name
+            extension = path.suffix[1:].lower()  # Remove dot and lowercase
+
             if short_date is None or long_datetime is None:
                 logger.error(f"Could not determine timestamp for {file_name}, skipping")
                 self.stats['skipped'] += 1
                 return False
-            
-            # Create target directory
+
+            # Create target directory; exist_ok makes the former
+            # os.path.exists probe redundant, and the set collapses the
+            # makedirs calls to one per date directory
             target_dir = os.path.join(self.dest_dir, short_date)
-            
-            if not self.dry_run and not os.path.exists(target_dir):
+
+            if not self.dry_run and target_dir not in self._created_dirs:
                 os.makedirs(target_dir, exist_ok=True)
+                self._created_dirs.add(target_dir)
                 logger.info(f"Created directory: {short_date}")
-            
+
             # Generate unique filename
-            original_stem = Path(file_path).stem
-            new_base_name = f"{long_datetime}_{original_stem}"
+            new_base_name = f"{long_datetime}_{path.stem}"
             new_file_name = self.generate_unique_filename(target_dir, new_base_name, extension)
-            
+
             target_path = os.path.join(target_dir, new_file_name)
-            
+
             # Check disk space
-            if not self.dry_run and not self.check_disk_space(file_path):
+            if (not self.dry_run and not self._in_place
+                    and not self.check_disk_space(file_path, file_size)):
                 logger.error(f"Skipping {file_name} due to insufficient disk space")
                 self.stats['skipped'] += 1
                 return False
-            
+
             # Move file
             if self.dry_run:
                 logger.info(f"[DRY RUN] Would move: {file_name} -> {short_date}/{new_file_name}")
             else:
-                shutil.move(file_path, target_path)
-                logger.info(f"Moved: {file_name} -> {short_date}/{new_file_name}")
-            
+                self._move(file_path, target_path)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(f"Moved: {file_name} -> {short_date}/{new_file_name}")
+
             self.stats['moved'] += 1
             self.stats['processed'] += 1
             return True
-            
+
         except Exception as e:
             logger.error(f"Error processing {Path(file_path).name}: {e}")
             self.stats['failed'] += 1
             return False
-    
-    def process_files_by_type(self, extensions: List[str], file_type: str):
-        """Process all files of given extensions."""
+
+    def process_files(self):
+        """Process every supported media file found in one directory scan."""
         all_files = []
-        for ext in extensions:
-            pattern = os.path.join(self.src_dir, f"*.{ext}")
-            files = self.case_insensitive_glob(pattern)
-            all_files.extend(files)
-        
+        # One os.scandir pass for all media types: the directory is read
+        # once, the EXT_TO_TYPE dict classifies each entry, and the DirEntry
+        # type and stat info come cached from the directory entry
+        with os.scandir(self.src_dir) as entries:
+            for entry in entries:
+                # rsplit returns the whole name when there is no dot, so a
+                # file named just "jpg" must not be classified by it
+                if not entry.is_file(follow_symlinks=False) or '.' not in entry.name:
+                    continue
+                file_type = EXT_TO_TYPE.get(entry.name.rsplit('.', 1)[-1].lower())
+                if file_type is not None:
+                    all_files.append((entry.path, file_type, entry.stat()))
+
         if not all_files:
-            logger.info(f"No {file_type} files found with extensions: {extensions}")
+            logger.info(f"No media files found with extensions: {sorted(EXT_TO_TYPE)}")
             return
-        
-        logger.info(f"Found {len(all_files)} {file_type} file(s) to process")
-        
-        # Use tqdm if available
-        if tqdm:
-            iterator = tqdm(all_files, desc=f"Processing {file_type}s", unit="file")
-        else:
-            iterator = all_files
-        
-        for file_path in iterator:
-            self.process_file(file_path, file_type)
+
+        logger.info(f"Found {len(all_files)} media file(s) to process")
+
+        # Answer from the persistent cache where (path, mtime, size) still
+        # matches; only the rest goes to the extraction pool
+        cached_results = []
+        tasks = []
+        task_keys = {}
+        # Sizes from the scandir stats, so commit_file needs no getsize
+        file_sizes = {file_path: st.st_size for file_path, _, st in all_files}
+        for file_path, file_type, st in all_files:
+            key = f"{os.path.abspath(file_path)}:{st.st_mtime_ns}:{st.st_size}"
+            if self._meta_cache is not None:
+                hit = self._meta_cache.get(key)
+                if hit is not None:
+                    cached_results.append((file_path, hit[0], hit[1]))
+                    continue
+            tasks.append((file_path, file_type, st))
+            task_keys[file_path] = key
+
+        # Metadata extraction is the CPU-heavy part and every file is
+        # independent, so it fans out over a process pool; the moves stay
+        # sequential on the main thread (see commit_file)
+        with ProcessPoolExecutor(max_workers=self.max_concurrency) as executor:
+            results = itertools.chain(cached_results,
+                                      self._run_extraction(executor, tasks))
+
+            # Use tqdm if available
+            if tqdm:
+                results = tqdm(results, total=len(all_files),
+                               desc="Processing media", unit="file")
+
+            for file_path, short_date, long_datetime in results:
+                if (self._meta_cache is not None and short_date is not None
+                        and file_path in task_keys):
+                    self._meta_cache[task_keys[file_path]] = (short_date, long_datetime)
+                self.commit_file(file_path, short_date, long_datetime,
+                                 file_sizes.get(file_path))
     
     def run(self):
         """Main execution method."""
@@ -323,12 +642,23 @@ class MediaSorter:
         logger.info(f"Destination directory: {self.dest_dir}")
         logger.info(f"Dry run mode: {self.dry_run}")
         logger.info("=" * 60)
-        
-        # Process images
-        self.process_files_by_type(SUPPORTED_IMAGE_FORMATS, 'image')
-        
-        # Process videos
-        self.process_files_by_type(SUPPORTED_VIDEO_FORMATS, 'video')
+
+        # Timestamps survive between runs (dry-run, then the real run) in a
+        # shelve keyed by (path, mtime, size); missing cache is not fatal
+        cache_path = os.path.join(self.dest_dir, '.media_sorter.cache')
+        try:
+            self._meta_cache = shelve.open(cache_path)
+        except Exception as e:
+            logger.warning(f"Could not open metadata cache {cache_path}: {e}")
+            self._meta_cache = None
+
+        try:
+            # Images and videos in one pass over the directory
+            self.process_files()
+        finally:
+            if self._meta_cache is not None:
+                self._meta_cache.close()
+                self._meta_cache = None
         
         # Print statistics
         logger.info("=" * 60)
@@ -344,16 +674,30 @@ def main():
     """Main entry point."""
     # Parse arguments
     if len(sys.argv) < 2:
-        print("Usage: python sort-media-improved.py <src_dir> [dest_dir] [--dry-run]")
+        print("Usage: python sort-media.py <src_dir> [dest_dir] [--dry-run]")
         print("\nOptions:")
         print("  src_dir     Source directory containing media files")
         print("  dest_dir    Destination directory (optional, defaults to src_dir)")
         print("  --dry-run   Simulate operations without making changes")
+        print("  --max-concurrency N   Number of metadata worker processes (default: all cores)")
         sys.exit(0)
-    
+
     src_dir = sys.argv[1]
     dry_run = '--dry-run' in sys.argv
-    
+
+    max_concurrency = None
+    if '--max-concurrency' in sys.argv:
+        idx = sys.argv.index('--max-concurrency')
+        try:
+            max_concurrency = int(sys.argv[idx + 1])
+        except (IndexError, ValueError):
+            print("Error: --max-concurrency requires an integer value")
+            sys.exit(1)
+        if max_concurrency < 1:
+            print("Error: --max-concurrency must be at least 1")
+            sys.exit(1)
+        del sys.argv[idx:idx + 2]
+
     # Remove --dry-run from argv for dest_dir detection
     args = [arg for arg in sys.argv[1:] if arg != '--dry-run']
     
@@ -377,7 +721,7 @@ def main():
         sys.exit(1)
     
     # Create sorter and run
-    sorter = MediaSorter(src_dir, dest_dir, dry_run)
+    sorter = MediaSorter(src_dir, dest_dir, dry_run, max_concurrency)
     sorter.run()
 
 